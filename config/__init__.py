@@ -1 +1 @@
-from .settings import DBSettings, JWTSettings, Settings
\ No newline at end of file
+from .settings import DBSettings, JWTSettings, Settings, get_db_settings, get_jwt_settings, get_redis_settings, get_password_settings
\ No newline at end of file
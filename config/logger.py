@@ -1,15 +1,32 @@
+import atexit
+import copy
 import logging
 import logging.handlers
+import queue
 import sys
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
+import orjson
 import structlog
-from structlog.types import EventDict, Processor
+from structlog.types import EventDict, FilteringBoundLogger, Processor
 
 LOG_DIR = Path('logs')
 LOG_DIR.mkdir(exist_ok=True)
+APP_LOG = str((LOG_DIR / 'app.log').resolve())
+BOT_LOG = str((LOG_DIR / 'bot.log').resolve())
+WEB_LOG = str((LOG_DIR / 'web.log').resolve())
+ERROR_LOG = str((LOG_DIR / 'error.log').resolve())
+AUDIT_LOG = str((LOG_DIR / 'audit.log').resolve())
+LOG_BUFFER_CAPACITY = 512
+ROLLOVER_CHECK_INTERVAL = 64
+LOG_FLUSH_INTERVAL = 0.1
 _logger_initialized = False
+_queue_listeners: list[logging.handlers.QueueListener] = []
 
 
 def add_service_context(logger: Any, method_name: str, event_dict: EventDict) -> EventDict:
@@ -21,7 +38,76 @@ def drop_color_message_key(logger: Any, method_name: str, event_dict: EventDict)
     return event_dict
 
 
+def format_exc_info_if_present(logger: Any, method_name: str, event_dict: EventDict) -> EventDict:
+    """format_exc_info только для записей с исключением"""
+    if event_dict.get('exc_info') is None:
+        return event_dict
+    return structlog.processors.format_exc_info(logger, method_name, event_dict)
+
+
+def capture_exc_info(logger: Any, method_name: str, event_dict: EventDict) -> EventDict:
+    """Фиксирует exc_info=True в кортеж, пока исключение еще доступно в потоке вызова"""
+    if event_dict.get('exc_info') is True:
+        event_dict['exc_info'] = sys.exc_info()
+    return event_dict
+
+
+def timestamp_from_record(logger: Any, method_name: str, event_dict: EventDict) -> EventDict:
+    """TimeStamper для stdlib-записей: время создания записи, а не момент форматирования"""
+    record = event_dict.get('_record')
+    created = record.created if record is not None else time.time()
+    event_dict['timestamp'] = datetime.fromtimestamp(created, tz=timezone.utc).isoformat().replace('+00:00', 'Z')
+    return event_dict
+
+
+def orjson_dumps(obj: Any, default: Any = None) -> str:
+    """Сериализатор для JSONRenderer: orjson вместо stdlib json"""
+    return orjson.dumps(
+        obj,
+        default=default,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+    ).decode()
+
+
+# Обработчики за QueueListener пишут уже отрендеренный текст
+PASSTHROUGH_FORMATTER = logging.Formatter('%(message)s')
+CONSOLE_PASSTHROUGH_FORMATTER = logging.Formatter('%(console_message)s')
+
+
+# Логгеры, записи которых относятся к сервису независимо от контекста (включая дочерние)
+SERVICE_LOGGERS = {
+    'svc.bot': 'bot',
+    'aiogram': 'bot',
+    'svc.web': 'web',
+    'uvicorn': 'web',
+    'fastapi': 'web',
+}
+
+
+@lru_cache(maxsize=1024)
+def _service_by_logger_name(name: str) -> str | None:
+    while name:
+        service = SERVICE_LOGGERS.get(name)
+        if service:
+            return service
+        name = name.rpartition('.')[0]
+    return None
+
+
+def resolve_service(record: logging.LogRecord) -> str | None:
+    """Сервис записи: по имени логгера, иначе по привязанному контексту (service из middleware)"""
+    service = _service_by_logger_name(record.name)
+    if service:
+        return service
+    if isinstance(record.msg, dict):
+        # structlog: contextvars уже слиты в event_dict
+        return record.msg.get('service')
+    return structlog.contextvars.get_contextvars().get('service')
+
+
 class ServiceFilter(logging.Filter):
+    """Пропускает записи своего сервиса и записи без сервиса (service выставляет StructlogQueueHandler)"""
+
     def __init__(self, service: str):
         super().__init__()
         self.service = service
@@ -31,6 +117,147 @@ class ServiceFilter(logging.Filter):
         return service == self.service or service is None
 
 
+class StructlogQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler, который рендерит запись ProcessorFormatter'ом в потоке вызова.
+
+    В фоновом потоке contextvars уже другие, а изменяемые значения могли измениться,
+    поэтому в очередь уходит копия записи с готовым текстом: message для файлов
+    и console_message для консоли (если задан отдельный console_formatter),
+    а также service для маршрутизации в bot.log/web.log.
+    """
+
+    def __init__(
+            self,
+            log_queue: queue.SimpleQueue,
+            formatter: logging.Formatter,
+            console_formatter: logging.Formatter | None = None
+    ):
+        super().__init__(log_queue)
+        self.setFormatter(formatter)
+        self.console_formatter = console_formatter
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        message = self.format(record)
+        service = resolve_service(record)
+        prepared = copy.copy(record)
+        prepared.msg = message
+        prepared.message = message
+        prepared.args = None
+        prepared.exc_info = None
+        prepared.exc_text = None
+        prepared.stack_info = None
+        prepared.service = service
+        if self.console_formatter is not None:
+            prepared.console_message = self.console_formatter.format(record)
+        return prepared
+
+
+class PeriodicFlusher(threading.Thread):
+    """Фоновый поток, периодически сбрасывающий буферы MemoryHandler на диск"""
+
+    def __init__(self, handlers: list[logging.Handler], interval: float = LOG_FLUSH_INTERVAL):
+        super().__init__(name='log-flusher', daemon=True)
+        self.handlers = handlers
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            for handler in self.handlers:
+                handler.flush()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+class CheapRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    RotatingFileHandler с дешевой проверкой ротации.
+
+    Размер берется из stream.tell() без seek/stat и повторного форматирования записи,
+    а при прямой записи проверка выполняется раз в ROLLOVER_CHECK_INTERVAL записей.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._emit_count = 0
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.maxBytes <= 0:
+            return False
+        if self.stream is None:
+            self.stream = self._open()
+        return self.stream.tell() >= self.maxBytes
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._emit_count += 1
+            if self._emit_count % ROLLOVER_CHECK_INTERVAL == 0 and self.shouldRollover(record):
+                self.doRollover()
+            logging.FileHandler.emit(self, record)
+        except Exception:
+            self.handleError(record)
+
+
+class BatchMemoryHandler(logging.handlers.MemoryHandler):
+    """
+    MemoryHandler, который сбрасывает буфер в файл одним вызовом write().
+
+    Проверка ротации выполняется один раз на пакет, а не на каждую запись.
+    Для нефайловых обработчиков поведение как у обычного MemoryHandler.
+    """
+
+    def flush(self) -> None:
+        target = self.target
+        if not isinstance(target, logging.FileHandler):
+            super().flush()
+            return
+        with self.lock:
+            records = [record for record in self.buffer if target.filter(record)]
+            self.buffer.clear()
+            if not records:
+                return
+            with target.lock:
+                try:
+                    data = ''.join(target.format(record) + target.terminator for record in records)
+                    if isinstance(target, logging.handlers.BaseRotatingHandler) \
+                            and target.shouldRollover(records[-1]):
+                        target.doRollover()
+                    if target.stream is None:
+                        target.stream = target._open()
+                    target.stream.write(data)
+                    target.stream.flush()
+                except Exception:
+                    target.handleError(records[-1])
+
+
+def buffered(handler: logging.Handler) -> logging.handlers.MemoryHandler:
+    """Обернуть файловый обработчик в MemoryHandler для пакетной записи"""
+    memory_handler = BatchMemoryHandler(
+        capacity=LOG_BUFFER_CAPACITY,
+        flushLevel=logging.ERROR,
+        target=handler,
+        flushOnClose=True
+    )
+    memory_handler.setLevel(handler.level)
+    return memory_handler
+
+
+def attach_queue(
+        logger: logging.Logger,
+        handlers: list[logging.Handler],
+        formatter: logging.Formatter,
+        console_formatter: logging.Formatter | None = None
+) -> logging.handlers.QueueListener:
+    """Подключить обработчики к логгеру через очередь и фоновый QueueListener"""
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    logger.addHandler(StructlogQueueHandler(log_queue, formatter, console_formatter))
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _queue_listeners.append(listener)
+    return listener
+
+
 def setup_logger(
         log_level: str = "INFO",
         json_logs: bool = False,
@@ -39,6 +266,10 @@ def setup_logger(
     global _logger_initialized
     if _logger_initialized:
         return
+    # Не собираем в LogRecord неиспользуемые атрибуты и не печатаем ошибки логирования
+    logging.raiseExceptions = False
+    logging.logThreads = False
+    logging.logProcesses = False
     timestamper = structlog.processors.TimeStamper(fmt="iso")
     shared_processors: list[Processor] = [
         structlog.contextvars.merge_contextvars,
@@ -48,35 +279,39 @@ def setup_logger(
         add_service_context,
         timestamper
     ]
+    # Для stdlib-записей время берется из record.created
+    foreign_pre_chain = shared_processors[:-1] + [timestamp_from_record]
     if json_logs:
         structlog_processors = shared_processors + [
             drop_color_message_key,
-            structlog.processors.format_exc_info,
-            structlog.processors.UnicodeDecoder(),
+            format_exc_info_if_present,
             structlog.stdlib.ProcessorFormatter.wrap_for_formatter
         ]
         formatter = structlog.stdlib.ProcessorFormatter(
-            foreign_pre_chain=shared_processors,
+            foreign_pre_chain=foreign_pre_chain,
             processors=[
                 structlog.stdlib.ProcessorFormatter.remove_processors_meta,
-                structlog.processors.JSONRenderer()
+                structlog.processors.JSONRenderer(serializer=orjson_dumps)
             ]
         )
     else:
         structlog_processors = shared_processors + [
             structlog.dev.set_exc_info,
+            capture_exc_info,
             structlog.stdlib.ProcessorFormatter.wrap_for_formatter
         ]
         formatter = structlog.stdlib.ProcessorFormatter(
-            foreign_pre_chain=shared_processors,
+            foreign_pre_chain=foreign_pre_chain,
             processors=[
                 structlog.stdlib.ProcessorFormatter.remove_processors_meta,
                 structlog.dev.ConsoleRenderer(colors=False)
             ]
         )
+    # Фильтрация по уровню до цепочки процессоров: вызовы ниже log_level ничего не стоят.
+    # Уровень фиксируется при настройке - для его смены нужно заново вызвать structlog.configure
     structlog.configure(
         processors=structlog_processors,
-        wrapper_class=structlog.stdlib.BoundLogger,
+        wrapper_class=structlog.make_filtering_bound_logger(getattr(logging, log_level)),
         context_class=dict,
         logger_factory=structlog.stdlib.LoggerFactory(),
         cache_logger_on_first_use=True
@@ -84,67 +319,84 @@ def setup_logger(
     root_logger = logging.getLogger()
     root_logger.handlers.clear()
     root_logger.setLevel(log_level)
+    handlers: list[logging.Handler] = []
+    console_formatter = None
     if enable_console:
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(logging.DEBUG if log_level == "DEBUG" else logging.INFO)
         if not json_logs:
             console_formatter = structlog.stdlib.ProcessorFormatter(
-                foreign_pre_chain=shared_processors,
+                foreign_pre_chain=foreign_pre_chain,
                 processors=[
                     structlog.stdlib.ProcessorFormatter.remove_processors_meta,
                     structlog.dev.ConsoleRenderer(colors=True)
                 ]
             )
-            console_handler.setFormatter(console_formatter)
+            console_handler.setFormatter(CONSOLE_PASSTHROUGH_FORMATTER)
         else:
-            console_handler.setFormatter(formatter)
-        root_logger.addHandler(console_handler)
-    all_handler = logging.handlers.RotatingFileHandler(
-        LOG_DIR / 'app.log',
+            console_handler.setFormatter(PASSTHROUGH_FORMATTER)
+        handlers.append(console_handler)
+    all_handler = CheapRotatingFileHandler(
+        APP_LOG,
         maxBytes=20 * 1024 * 1024,
         backupCount=5,
         encoding='utf-8'
     )
     all_handler.setLevel(logging.DEBUG)
-    all_handler.setFormatter(formatter)
-    root_logger.addHandler(all_handler)
+    all_handler.setFormatter(PASSTHROUGH_FORMATTER)
+    handlers.append(buffered(all_handler))
 
-    bot_handler = logging.handlers.RotatingFileHandler(
-        LOG_DIR / 'bot.log',
+    bot_handler = CheapRotatingFileHandler(
+        BOT_LOG,
         maxBytes=10 * 1024 * 1024,
         backupCount=3,
         encoding='utf-8'
     )
     bot_handler.setLevel(logging.DEBUG)
-    bot_handler.setFormatter(formatter)
-    bot_handler.addFilter(ServiceFilter("bot"))
-    root_logger.addHandler(bot_handler)
+    bot_handler.setFormatter(PASSTHROUGH_FORMATTER)
+    bot_handler = buffered(bot_handler)
+    bot_handler.addFilter(ServiceFilter('bot'))
+    handlers.append(bot_handler)
 
-    web_handler = logging.handlers.RotatingFileHandler(
-        LOG_DIR / 'web.log',
+    web_handler = CheapRotatingFileHandler(
+        WEB_LOG,
         maxBytes=10 * 1024 * 1024,
         backupCount=3,
         encoding='utf-8'
     )
     web_handler.setLevel(logging.DEBUG)
-    web_handler.setFormatter(formatter)
-    web_handler.addFilter(ServiceFilter("web"))
-    root_logger.addHandler(web_handler)
+    web_handler.setFormatter(PASSTHROUGH_FORMATTER)
+    web_handler = buffered(web_handler)
+    web_handler.addFilter(ServiceFilter('web'))
+    handlers.append(web_handler)
 
     error_handler = logging.handlers.TimedRotatingFileHandler(
-        LOG_DIR / 'error.log',
+        ERROR_LOG,
         when='midnight',
         interval=1,
         backupCount=30,
         encoding='utf-8'
     )
     error_handler.setLevel(logging.DEBUG)
-    error_handler.setFormatter(formatter)
-    root_logger.addHandler(error_handler)
+    error_handler.setFormatter(PASSTHROUGH_FORMATTER)
+    handlers.append(buffered(error_handler))
+
+    # Рендеринг и определение сервиса выполняются в потоке вызова (StructlogQueueHandler.prepare),
+    # запись на диск и фильтрация по сервису для bot.log/web.log - в фоновом потоке
+    attach_queue(root_logger, handlers, formatter, console_formatter)
+    flusher = PeriodicFlusher([
+        handler for listener in _queue_listeners for handler in listener.handlers
+        if isinstance(handler, logging.handlers.MemoryHandler)
+    ])
+    flusher.start()
+    atexit.register(flusher.stop)
+    for listener in _queue_listeners:
+        listener.start()
+        atexit.register(listener.stop)
 
     audit_logger = logging.getLogger('audit')
-    audit_handler = logging.handlers.RotatingFileHandler(
-        LOG_DIR / 'audit.log',
+    audit_handler = CheapRotatingFileHandler(
+        AUDIT_LOG,
         maxBytes=5 * 1024 * 1024,
         backupCount=10,
         encoding='utf-8'
@@ -163,6 +415,7 @@ def setup_logger(
     logging.getLogger('fastapi').setLevel(logging.INFO)
 
     _logger_initialized = True
+    _cached_get_logger.cache_clear()
     logger = structlog.get_logger(__name__)
     logger.info(
         "Logger_initialized",
@@ -172,14 +425,50 @@ def setup_logger(
     )
 
 
+def service_logger_name(name: str | None, service: str | None) -> str | None:
+    """Имя stdlib-логгера: записи ветки svc.<service> всегда попадают в <service>.log"""
+    if not service:
+        return name
+    return f"svc.{service}.{name}" if name else f"svc.{service}"
+
+
+def _build_logger(
+        name: str | None,
+        service: str | None,
+        context: dict[str, Any]
+) -> FilteringBoundLogger:
+    name = service_logger_name(name, service)
+    # Привязываем контекст сервиса
+    bind_context = {}
+    if service:
+        bind_context["service"] = service
+    if context:
+        bind_context.update(context)
+
+    # Ленивый прокси: конфигурация structlog применяется при первом использовании,
+    # поэтому логгер можно получить на этапе импорта, до setup_logger
+    return structlog.get_logger(name, **bind_context)
+
+
+@lru_cache(maxsize=1024)
+def _cached_get_logger(
+        name: str | None,
+        service: str | None,
+        ctx_key: tuple[tuple[str, Any], ...]
+) -> FilteringBoundLogger:
+    return _build_logger(name, service, dict(ctx_key))
+
+
 def get_logger(
         name: str | None = None,
         service: str | None = None,
         **context: Any
-) -> structlog.stdlib.BoundLogger:
+) -> FilteringBoundLogger:
     """
     Получить логгер с привязанным контекстом
 
+    Логгеры с одинаковыми name/service/context кэшируются после настройки structlog.
+
     Args:
         name: Имя логгера (обычно name)
         service: Сервис (bot, web)
@@ -192,22 +481,17 @@ def get_logger(
     logger = get_logger(name, service="bot", user_id=123)
         logger.info("user_action", action="start")
     """
-    logger = structlog.get_logger(name)
-
-    # Привязываем контекст сервиса
-    bind_context = {}
-    if service:
-        bind_context["service"] = service
-    if context:
-        bind_context.update(context)
-
-    if bind_context:
-        logger = logger.bind(**bind_context)
-
-    return logger
+    # До setup_logger не кэшируем: логгер был бы собран со стандартной конфигурацией
+    if structlog.is_configured():
+        try:
+            return _cached_get_logger(name, service, tuple(sorted(context.items())))
+        except TypeError:
+            # Нехэшируемые значения контекста
+            pass
+    return _build_logger(name, service, context)
 
 
-def get_audit_logger(**context: Any) -> structlog.stdlib.BoundLogger:
+def get_audit_logger(**context: Any) -> FilteringBoundLogger:
     """
     Получить логгер для аудита
 
@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -8,7 +11,11 @@ class DBSettings(BaseSettings):
     USER_NAME: str
     PASSWORD: str
     DB_NAME: str
-    ECHO: str
+    ECHO: bool = False
+    POOL_SIZE: int = 10
+    MAX_OVERFLOW: int = 20
+    POOL_RECYCLE: int = 1800
+    NULL_POOL: bool = False  # Без пула соединений (для тестов)
 
     class Config:
         env_file = ".env"
@@ -42,7 +49,37 @@ class RedisSettings(BaseSettings):
         return f"redis://{self.HOST}:{self.PORT}/{self.DB}"
 
 
+class PasswordSettings(BaseSettings):
+    PASSWORD_HASHER: Literal["argon2", "bcrypt"] = "argon2"
+    BCRYPT_ROUNDS: int = 12
+
+    class Config:
+        env_file = ".env"
+        extra = "ignore"
+
+
+@lru_cache(maxsize=1)
+def get_db_settings() -> DBSettings:
+    return DBSettings()
+
+
+@lru_cache(maxsize=1)
+def get_jwt_settings() -> JWTSettings:
+    return JWTSettings()
+
+
+@lru_cache(maxsize=1)
+def get_redis_settings() -> RedisSettings:
+    return RedisSettings()
+
+
+@lru_cache(maxsize=1)
+def get_password_settings() -> PasswordSettings:
+    return PasswordSettings()
+
+
 class Settings:
-    db = DBSettings()
-    jwt = JWTSettings()
-    redis = RedisSettings()
+    db = get_db_settings()
+    jwt = get_jwt_settings()
+    redis = get_redis_settings()
+    password = get_password_settings()
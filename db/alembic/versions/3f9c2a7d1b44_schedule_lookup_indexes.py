@@ -0,0 +1,34 @@
+"""schedule lookup indexes
+
+Revision ID: 3f9c2a7d1b44
+Revises: e60dfa98caf5
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c2a7d1b44'
+down_revision: Union[str, Sequence[str], None] = 'e60dfa98caf5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_schedule_group_week_day', 'schedule', ['group_id', 'week_type', 'day_of_week'], unique=False,
+                    postgresql_include=['subject_id', 'teacher_id', 'room_id', 'time_slot_id'])
+    op.create_index('ix_schedule_teacher_day', 'schedule', ['teacher_id', 'day_of_week'], unique=False)
+    op.create_index('ix_schedule_changes_schedule_date', 'schedule_changes', ['original_schedule_id', 'change_date'],
+                    unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_schedule_changes_schedule_date', table_name='schedule_changes')
+    op.drop_index('ix_schedule_teacher_day', table_name='schedule')
+    op.drop_index('ix_schedule_group_week_day', table_name='schedule')
@@ -0,0 +1,38 @@
+"""teacher fullname unique
+
+Revision ID: 8d41e6b0c2f7
+Revises: 3f9c2a7d1b44
+Create Date: 2026-10-15 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d41e6b0c2f7'
+down_revision: Union[str, Sequence[str], None] = '3f9c2a7d1b44'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index(op.f('ix_teachers_first_name'), table_name='teachers')
+    op.drop_index(op.f('ix_teachers_last_name'), table_name='teachers')
+    op.drop_index(op.f('ix_teachers_middle_name'), table_name='teachers')
+    op.create_unique_constraint('uq_teacher_fullname', 'teachers', ['last_name', 'first_name', 'middle_name'])
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_teacher_lastname_trgm', 'teachers', ['last_name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'last_name': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_teacher_lastname_trgm', table_name='teachers', postgresql_using='gin')
+    op.drop_constraint('uq_teacher_fullname', 'teachers', type_='unique')
+    op.create_index(op.f('ix_teachers_middle_name'), 'teachers', ['middle_name'], unique=True)
+    op.create_index(op.f('ix_teachers_last_name'), 'teachers', ['last_name'], unique=True)
+    op.create_index(op.f('ix_teachers_first_name'), 'teachers', ['first_name'], unique=True)
@@ -0,0 +1,40 @@
+"""schedule week_type smallint
+
+Revision ID: c7a3e91f5d20
+Revises: 8d41e6b0c2f7
+Create Date: 2026-10-15 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7a3e91f5d20'
+down_revision: Union[str, Sequence[str], None] = '8d41e6b0c2f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_constraint('check_week_type', 'schedule', type_='check')
+    op.alter_column('schedule', 'week_type',
+                    existing_type=sa.String(length=10),
+                    type_=sa.SmallInteger(),
+                    existing_nullable=False,
+                    postgresql_using="CASE week_type WHEN 'upper' THEN 0 WHEN 'lower' THEN 1 ELSE 2 END")
+    op.create_check_constraint('check_week_type', 'schedule', 'week_type >= 0 AND week_type <= 2')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('check_week_type', 'schedule', type_='check')
+    op.alter_column('schedule', 'week_type',
+                    existing_type=sa.SmallInteger(),
+                    type_=sa.String(length=10),
+                    existing_nullable=False,
+                    postgresql_using="CASE week_type WHEN 0 THEN 'upper' WHEN 1 THEN 'lower' ELSE 'both' END")
+    op.create_check_constraint('check_week_type', 'schedule', "week_type IN ('upper', 'lower', 'both')")
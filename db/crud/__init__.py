@@ -1 +1 @@
-from .crud import create_admin_user
\ No newline at end of file
+from .crud import create_admin_user, get_day_schedule
\ No newline at end of file
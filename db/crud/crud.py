@@ -1,6 +1,8 @@
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from db.models import AdminUser
+from db.models import AdminUser, Schedule
 from tools import PasswordHasher
 
 
@@ -22,14 +24,41 @@ async def create_admin_user(session: AsyncSession,
     :param is_active: активен или нет(по умолчанию нет, нужно рассмотрение со стороны главного админа)
     :return: Администратор
     """
-    hashed_password = PasswordHasher.hash_password(password)
-    user = AdminUser(username=username,
-                     email=email,
-                     full_name=full_name,
-                     password_hash=hashed_password,
-                     role=role,
-                     is_active=is_active)
-    session.add(user)
+    # Хэширование пароля блокирует event loop на сотни мс - выполняем в отдельном потоке
+    hashed_password = await PasswordHasher.hash_password_async(password)
+    stmt = insert(AdminUser).values(username=username,
+                                    email=email,
+                                    full_name=full_name,
+                                    password_hash=hashed_password,
+                                    role=role,
+                                    is_active=is_active).returning(AdminUser)
+    user = (await session.scalars(stmt)).one()
     await session.commit()
-    await session.refresh(user)
-    return user
\ No newline at end of file
+    return user
+
+
+async def get_day_schedule(session: AsyncSession,
+                           group_id: int,
+                           day_of_week: int,
+                           week_type: str) -> list[Schedule]:
+    """
+    Расписание группы на день с предзагруженными связями (без N+1 запросов)
+    :param session: Сессия бд
+    :param group_id: id группы
+    :param day_of_week: день недели (1-6)
+    :param week_type: тип недели ('upper' или 'lower'), занятия 'both' включаются всегда
+    :return: Список занятий, отсортированный по времени пары
+    """
+    stmt = (
+        select(Schedule)
+        .options(selectinload(Schedule.subject),
+                 selectinload(Schedule.teacher),
+                 selectinload(Schedule.room),
+                 selectinload(Schedule.lesson_type),
+                 selectinload(Schedule.time_slot))
+        .where(Schedule.group_id == group_id,
+               Schedule.day_of_week == day_of_week,
+               Schedule.week_type.in_((week_type, 'both')))
+        .order_by(Schedule.time_slot_id)
+    )
+    return list((await session.scalars(stmt)).all())
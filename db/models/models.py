@@ -1,14 +1,31 @@
 from datetime import datetime, date, time
 from typing import Optional
 from sqlalchemy import (Column, Integer, String, Boolean, DateTime, Date, Time, Text, ForeignKey, BigInteger,
-                        CheckConstraint, UniqueConstraint, func)
+                        SmallInteger, CheckConstraint, UniqueConstraint, Index, func)
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, Mapped, mapped_column
+from sqlalchemy.orm import relationship, Mapped, mapped_column, reconstructor, validates
 from sqlalchemy_utils import EmailType
 from sqlalchemy.ext.asyncio import AsyncAttrs, create_async_engine, async_sessionmaker
 
 Base = declarative_base()
 
+# Коды типа недели в БД
+WEEK_TYPE_CODES = {'upper': 0, 'lower': 1, 'both': 2}
+WEEK_TYPE_NAMES = {code: name for name, code in WEEK_TYPE_CODES.items()}
+
+
+class WeekType(TypeDecorator):
+    """Тип недели: в Python строка ('upper', 'lower', 'both'), в БД SMALLINT"""
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else WEEK_TYPE_CODES[value]
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else WEEK_TYPE_NAMES[value]
+
 
 class Group(Base):
     """Студенческая группа"""
@@ -58,11 +75,17 @@ class Teacher(Base):
     __tablename__ = "teachers"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    first_name: Mapped[str] = mapped_column(String(30), unique=True, nullable=False, index=True)
-    last_name: Mapped[str] = mapped_column(String(50), unique=True, nullable=False, index=True)
-    middle_name: Mapped[str] = mapped_column(String(50), unique=True, nullable=False, index=True)
+    first_name: Mapped[str] = mapped_column(String(30), nullable=False)
+    last_name: Mapped[str] = mapped_column(String(50), nullable=False)
+    middle_name: Mapped[str] = mapped_column(String(50), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
 
+    __table_args__ = (
+        UniqueConstraint('last_name', 'first_name', 'middle_name', name='uq_teacher_fullname'),
+        Index('ix_teacher_lastname_trgm', 'last_name', postgresql_using='gin',
+              postgresql_ops={'last_name': 'gin_trgm_ops'}),
+    )
+
     schedules = relationship("Schedule", back_populates="teacher")
     schedule_changes = relationship("ScheduleChange", foreign_keys="ScheduleChange.new_teacher_id")
 
@@ -150,7 +173,7 @@ class Schedule(Base):
     time_slot_id: Mapped[int] = mapped_column(ForeignKey('time_slots.id'), nullable=False)
 
     day_of_week: Mapped[int] = mapped_column(Integer, nullable=False)
-    week_type: Mapped[str] = mapped_column(String(10), nullable=False)
+    week_type: Mapped[str] = mapped_column(WeekType, nullable=False)
 
     is_online: Mapped[bool] = mapped_column(Boolean, default=False)
     notes: Mapped[Optional[str]] = mapped_column(Text)
@@ -161,8 +184,11 @@ class Schedule(Base):
 
     __table_args__ = (
         CheckConstraint('day_of_week >= 1 AND day_of_week <= 6', name='check_day_of_week'),
-        CheckConstraint("week_type IN ('upper', 'lower', 'both')", name='check_week_type'),
-        UniqueConstraint('group_id', 'day_of_week', 'time_slot_id', 'week_type', name='unique_schedule_slot')
+        CheckConstraint('week_type >= 0 AND week_type <= 2', name='check_week_type'),
+        UniqueConstraint('group_id', 'day_of_week', 'time_slot_id', 'week_type', name='unique_schedule_slot'),
+        Index('ix_schedule_group_week_day', 'group_id', 'week_type', 'day_of_week',
+              postgresql_include=['subject_id', 'teacher_id', 'room_id', 'time_slot_id']),
+        Index('ix_schedule_teacher_day', 'teacher_id', 'day_of_week'),
     )
 
     group = relationship("Group", back_populates="schedules")
@@ -174,7 +200,8 @@ class Schedule(Base):
     changes = relationship("ScheduleChange", back_populates="original_schedule", cascade="all, delete-orphan")
 
     def __repr__(self):
-        return f"Расписание {self.group.name}, {self.day_of_week}, {self.time_slot.slot_number}"
+        # Только собственные колонки: обращение к связям вызвало бы lazy-load
+        return f"Расписание {self.id}: группа {self.group_id}, {self.day_of_week}, слот {self.time_slot_id}"
 
 
 class BotUser(Base):
@@ -219,6 +246,18 @@ class SemesterSettings(Base):
         CheckConstraint("first_week_type IN ('upper', 'lower', 'both')", name="check_first_week_type"),
     )
 
+    # Тип недели по четности номера недели от начала семестра
+    _week_type_table: tuple[str, str] = ('lower', 'upper')
+
+    @validates('first_week_type')
+    def _validate_first_week_type(self, key, value):
+        self._week_type_table = ('upper', 'lower') if value == 'upper' else ('lower', 'upper')
+        return value
+
+    @reconstructor
+    def _init_week_type_table(self):
+        self._week_type_table = ('upper', 'lower') if self.first_week_type == 'upper' else ('lower', 'upper')
+
     def __repr__(self):
         return f"Семестр {self.semester_name}"
 
@@ -251,6 +290,10 @@ class ScheduleChange(Base):
     new_time_slot = relationship("TimeSlot")
     created_by_user = relationship("BotUser", back_populates='created_changes')
 
+    __table_args__ = (
+        Index('ix_schedule_changes_schedule_date', 'original_schedule_id', 'change_date'),
+    )
+
     def __repr__(self):
         return f'Изменение в расписании {self.change_date} {self.id}'
 
@@ -3,11 +3,22 @@ from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.pool import NullPool
 
-from config import DBSettings
+from config import get_db_settings
 
-db_settings = DBSettings()
+db_settings = get_db_settings()
 DATABASE_URL = f'postgresql+asyncpg://{db_settings.USER_NAME}:{db_settings.PASSWORD}@{db_settings.HOST}:{db_settings.PORT}/{db_settings.DB_NAME}'
-engine = create_async_engine(DATABASE_URL, echo=bool(db_settings.ECHO), poolclass=NullPool)
+if db_settings.NULL_POOL:
+    engine = create_async_engine(DATABASE_URL, echo=db_settings.ECHO, poolclass=NullPool)
+else:
+    engine = create_async_engine(
+        DATABASE_URL,
+        echo=db_settings.ECHO,
+        pool_size=db_settings.POOL_SIZE,
+        max_overflow=db_settings.MAX_OVERFLOW,
+        pool_pre_ping=True,
+        pool_recycle=db_settings.POOL_RECYCLE,
+        connect_args={"statement_cache_size": 1024, "prepared_statement_cache_size": 100}
+    )
 async_session_maker = async_sessionmaker(
     bind=engine, class_=AsyncSession,
     expire_on_commit=False
@@ -1,8 +1,10 @@
 """
 Общие middleware для бота и веб-сервиса
 """
+import logging
+import os
+import random
 import time
-import uuid
 from typing import Any, Awaitable, Callable
 
 import structlog
@@ -10,11 +12,88 @@ from aiogram import BaseMiddleware
 from aiogram.types import Message, CallbackQuery, TelegramObject
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
-from structlog.contextvars import bind_contextvars, clear_contextvars
+from structlog.contextvars import bind_contextvars, unbind_contextvars
+
+from config.logger import service_logger_name
+
+# Логгеры в ветках svc.bot/svc.web попадают также в bot.log/web.log
+bot_logger = structlog.get_logger(service_logger_name(__name__, "bot"))
+web_logger = structlog.get_logger(service_logger_name(__name__, "web"))
+# stdlib-логгеры тех же веток: дешевая проверка уровня до сборки event_dict
+_bot_stdlib_logger = logging.getLogger(service_logger_name(__name__, "bot"))
+_web_stdlib_logger = logging.getLogger(service_logger_name(__name__, "web"))
+
+# request_id нужен только для корреляции логов, криптостойкость не требуется
+_rng = random.Random(os.urandom(8))
+os.register_at_fork(after_in_child=lambda: _rng.seed(os.urandom(8)))
+
+
+def _request_id() -> str:
+    """Короткий идентификатор запроса (8 hex-символов)"""
+    return f"{_rng.getrandbits(32):08x}"
+
+
+# Не больше ERROR_TRACEBACK_LIMIT полных трейсбеков в секунду на тип исключения
+ERROR_TRACEBACK_LIMIT = 10
+_error_windows: dict[type, tuple[float, int]] = {}
+
+
+def _error_log_fields(exc: Exception) -> dict[str, Any]:
+    """exc_info для лога ошибки или, при шторме однотипных ошибок, только счетчик повторов"""
+    now = time.monotonic()
+    window_start, count = _error_windows.get(type(exc), (now, 0))
+    if now - window_start >= 1:
+        window_start, count = now, 0
+    count += 1
+    _error_windows[type(exc)] = (window_start, count)
+    if count <= ERROR_TRACEBACK_LIMIT:
+        return {"exc_info": exc}
+    return {"repeated": count}
 
 
 # ============ MIDDLEWARE ДЛЯ БОТА ============
 
+_EventData = tuple[int | None, str | None, int | None, dict[str, Any]]
+
+
+def _extract_message(event: Message, info_enabled: bool) -> _EventData:
+    """user_id, username, chat_id и данные для лога из сообщения"""
+    user = event.from_user
+    event_info = {
+        "message_id": event.message_id,
+        "text": event.text[:100] if event.text else None,
+        "content_type": event.content_type,
+    } if info_enabled else {}
+    return (
+        user.id if user else None,
+        user.username if user else None,
+        event.chat.id if event.chat else None,
+        event_info,
+    )
+
+
+def _extract_callback(event: CallbackQuery, info_enabled: bool) -> _EventData:
+    """user_id, username, chat_id и данные для лога из callback-запроса"""
+    user = event.from_user
+    event_info = {
+        "callback_data": event.data,
+        "message_id": event.message.message_id if event.message else None,
+    } if info_enabled else {}
+    return (
+        user.id if user else None,
+        user.username if user else None,
+        event.message.chat.id if event.message and event.message.chat else None,
+        event_info,
+    )
+
+
+# Тип события -> функция извлечения данных (новые типы событий регистрируются здесь)
+_EXTRACTORS: dict[type, Callable[[Any, bool], _EventData]] = {
+    Message: _extract_message,
+    CallbackQuery: _extract_callback,
+}
+
+
 class BotLoggingMiddleware(BaseMiddleware):
     """Middleware для логирования событий бота"""
 
@@ -24,75 +103,61 @@ class BotLoggingMiddleware(BaseMiddleware):
             event: TelegramObject,
             data: dict[str, Any],
     ) -> Any:
-        clear_contextvars()
-
-        request_id = str(uuid.uuid4())[:8]
-        logger = structlog.get_logger()
+        request_id = _request_id()
 
         # Извлекаем информацию
-        user_id = None
-        username = None
-        chat_id = None
         event_type = type(event).__name__
-
-        if isinstance(event, Message):
-            user_id = event.from_user.id if event.from_user else None
-            username = event.from_user.username if event.from_user else None
-            chat_id = event.chat.id if event.chat else None
-            event_info = {
-                "message_id": event.message_id,
-                "text": event.text[:100] if event.text else None,
-                "content_type": event.content_type,
-            }
-        elif isinstance(event, CallbackQuery):
-            user_id = event.from_user.id if event.from_user else None
-            username = event.from_user.username if event.from_user else None
-            chat_id = event.message.chat.id if event.message and event.message.chat else None
-            event_info = {
-                "callback_data": event.data,
-                "message_id": event.message.message_id if event.message else None,
-            }
+        info_enabled = _bot_stdlib_logger.isEnabledFor(logging.INFO)
+        extractor = _EXTRACTORS.get(type(event))
+        if extractor:
+            user_id, username, chat_id, event_info = extractor(event, info_enabled)
         else:
-            event_info = {}
-
-        # Привязываем контекст
-        bind_contextvars(
-            service="bot",
-            request_id=request_id,
-            user_id=user_id,
-            username=username,
-            chat_id=chat_id,
-            event_type=event_type,
-        )
-
-        logger.info("bot_event_received", **event_info)
-
-        start_time = time.time()
+            user_id, username, chat_id, event_info = None, None, None, {}
+
+        # Привязываем контекст одним вызовом, пропуская пустые значения
+        context = {
+            key: value for key, value in (
+                ("service", "bot"),
+                ("request_id", request_id),
+                ("user_id", user_id),
+                ("username", username),
+                ("chat_id", chat_id),
+                ("event_type", event_type),
+            ) if value is not None
+        }
+        bind_contextvars(**context)
+
+        if info_enabled:
+            bot_logger.info("bot_event_received", **event_info)
+
+        start_ns = time.perf_counter_ns()
 
         try:
             result = await handler(event, data)
 
-            duration = time.time() - start_time
-            logger.info(
-                "bot_event_processed",
-                duration_ms=round(duration * 1000, 2),
-                success=True,
-            )
+            if info_enabled:
+                duration_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+                bot_logger.info(
+                    "bot_event_processed",
+                    duration_ms=duration_ms,
+                    success=True,
+                )
 
             return result
 
         except Exception as e:
-            duration = time.time() - start_time
-            logger.error(
+            duration_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+            bot_logger.error(
                 "bot_event_failed",
-                duration_ms=round(duration * 1000, 2),
+                duration_ms=duration_ms,
                 error=str(e),
                 error_type=type(e).__name__,
-                exc_info=True,
+                **_error_log_fields(e),
             )
             raise
         finally:
-            clear_contextvars()
+            # Снимаем только свои ключи, не трогая контекст вызывающего кода
+            unbind_contextvars(*context)
 
 
 # ============ MIDDLEWARE ДЛЯ ВЕБА ============
@@ -105,10 +170,7 @@ class WebLoggingMiddleware(BaseHTTPMiddleware):
             request: Request,
             call_next: Callable,
     ) -> Response:
-        clear_contextvars()
-
-        request_id = str(uuid.uuid4())[:8]
-        logger = structlog.get_logger()
+        request_id = _request_id()
 
         # Извлекаем информацию о запросе
         client_ip = request.client.host if request.client else "unknown"
@@ -117,50 +179,53 @@ class WebLoggingMiddleware(BaseHTTPMiddleware):
         user_agent = request.headers.get("user-agent", "unknown")
 
         # Привязываем контекст
-        bind_contextvars(
-            service="web",
-            request_id=request_id,
-            client_ip=client_ip,
-            method=method,
-            path=path,
-            user_agent=user_agent,
-        )
-
-        logger.debug(
-            "web_request_received",
-            query_params=dict(request.query_params) if request.query_params else None,
-        )
-
-        start_time = time.time()
+        context = {
+            "service": "web",
+            "request_id": request_id,
+            "client_ip": client_ip,
+            "method": method,
+            "path": path,
+            "user_agent": user_agent,
+        }
+        bind_contextvars(**context)
+
+        if _web_stdlib_logger.isEnabledFor(logging.DEBUG):
+            web_logger.debug(
+                "web_request_received",
+                query_params=dict(request.query_params) if request.query_params else None,
+            )
+
+        start_ns = time.perf_counter_ns()
 
         try:
             response = await call_next(request)
 
-            duration = time.time() - start_time
+            duration_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
 
             # Добавляем request_id в заголовки
             response.headers["X-Request-ID"] = request_id
 
-            logger.info(
+            web_logger.info(
                 "web_request_completed",
                 status_code=response.status_code,
-                duration_ms=round(duration * 1000, 2),
+                duration_ms=duration_ms,
             )
 
             return response
 
         except Exception as e:
-            duration = time.time() - start_time
-            logger.error(
+            duration_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+            web_logger.error(
                 "web_request_failed",
-                duration_ms=round(duration * 1000, 2),
+                duration_ms=duration_ms,
                 error=str(e),
                 error_type=type(e).__name__,
-                exc_info=True,
+                **_error_log_fields(e),
             )
             raise
         finally:
-            clear_contextvars()
+            # Снимаем только свои ключи, не трогая контекст вызывающего кода
+            unbind_contextvars(*context)
 
 
 # ============ ОБЩИЙ MIDDLEWARE ДЛЯ ПРОИЗВОДИТЕЛЬНОСТИ ============
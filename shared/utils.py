@@ -1,108 +1,115 @@
 """
 Общие утилиты, используемые и в боте, и в веб-сервисе
 """
+import logging
 import time
 from typing import Any
 from functools import wraps
+from inspect import iscoroutinefunction
 
-from config.logger import get_logger
-from structlog.contextvars import bind_contextvars
+from config.logger import get_logger, service_logger_name
+from structlog.contextvars import bind_contextvars, reset_contextvars
 
 
 # ============ ДЕКОРАТОРЫ ============
 
-def log_execution(service: str = None):
-    """
-    Декоратор для логирования выполнения функций
-
-    Args:
-        service: Название сервиса (bot/web), если None - берется из контекста
-
-    Example:
-        @log_execution(service="bot")
-        async def process_payment(user_id: int):
-            ...
-    """
-
-    def decorator(func):
-        @wraps(func)
-        async def async_wrapper(*args, **kwargs):
-            logger = get_logger(func.__module__, service=service)
-
+def _make_async_wrapper(func, logger, stdlib_logger):
+    @wraps(func)
+    async def async_wrapper(*args, **kwargs):
+        debug_enabled = stdlib_logger.isEnabledFor(logging.DEBUG)
+        if debug_enabled:
             logger.debug(
                 "function_started",
-                function=func.__name__,
                 args_count=len(args),
                 kwargs_keys=list(kwargs.keys()),
             )
 
-            start_time = time.time()
+        start_time = time.perf_counter()
 
-            try:
-                result = await func(*args, **kwargs)
-                duration = time.time() - start_time
+        try:
+            result = await func(*args, **kwargs)
 
+            if debug_enabled:
+                duration = time.perf_counter() - start_time
                 logger.debug(
                     "function_completed",
-                    function=func.__name__,
                     duration_ms=round(duration * 1000, 2),
                 )
 
-                return result
+            return result
 
-            except Exception as e:
-                duration = time.time() - start_time
-                logger.error(
-                    "function_failed",
-                    function=func.__name__,
-                    duration_ms=round(duration * 1000, 2),
-                    error=str(e),
-                    error_type=type(e).__name__,
-                    exc_info=True,
-                )
-                raise
+        except Exception as e:
+            duration = time.perf_counter() - start_time
+            logger.error(
+                "function_failed",
+                duration_ms=round(duration * 1000, 2),
+                error=str(e),
+                error_type=type(e).__name__,
+                exc_info=True,
+            )
+            raise
 
-        @wraps(func)
-        def sync_wrapper(*args, **kwargs):
-            logger = get_logger(func.__module__, service=service)
+    return async_wrapper
 
-            logger.debug(
-                "function_started",
-                function=func.__name__,
-            )
 
-            start_time = time.time()
+def _make_sync_wrapper(func, logger, stdlib_logger):
+    @wraps(func)
+    def sync_wrapper(*args, **kwargs):
+        debug_enabled = stdlib_logger.isEnabledFor(logging.DEBUG)
+        if debug_enabled:
+            logger.debug("function_started")
+
+        start_time = time.perf_counter()
 
-            try:
-                result = func(*args, **kwargs)
-                duration = time.time() - start_time
+        try:
+            result = func(*args, **kwargs)
 
+            if debug_enabled:
+                duration = time.perf_counter() - start_time
                 logger.debug(
                     "function_completed",
-                    function=func.__name__,
                     duration_ms=round(duration * 1000, 2),
                 )
 
-                return result
+            return result
 
-            except Exception as e:
-                duration = time.time() - start_time
-                logger.error(
-                    "function_failed",
-                    function=func.__name__,
-                    duration_ms=round(duration * 1000, 2),
-                    error=str(e),
-                    error_type=type(e).__name__,
-                    exc_info=True,
-                )
-                raise
+        except Exception as e:
+            duration = time.perf_counter() - start_time
+            logger.error(
+                "function_failed",
+                duration_ms=round(duration * 1000, 2),
+                error=str(e),
+                error_type=type(e).__name__,
+                exc_info=True,
+            )
+            raise
+
+    return sync_wrapper
+
+
+def log_execution(service: str = None):
+    """
+    Декоратор для логирования выполнения функций
+
+    Args:
+        service: Название сервиса (bot/web), если None - берется из контекста (service, привязанный middleware)
+
+    Example:
+        @log_execution(service="bot")
+        async def process_payment(user_id: int):
+            ...
+    """
 
-        # Возвращаем правильную обертку
-        import asyncio
-        if asyncio.iscoroutinefunction(func):
-            return async_wrapper
-        else:
-            return sync_wrapper
+    def decorator(func):
+        # Логгер создается один раз на функцию, имя функции привязано к нему
+        logger = get_logger(func.__module__, service=service, function=func.__name__)
+        # stdlib-логгер для дешевой проверки уровня: при выключенном DEBUG не собираем данные для лога
+        stdlib_logger = logging.getLogger(service_logger_name(func.__module__, service))
+
+        # Создаем только нужную обертку
+        if iscoroutinefunction(func):
+            return _make_async_wrapper(func, logger, stdlib_logger)
+        return _make_sync_wrapper(func, logger, stdlib_logger)
 
     return decorator
 
@@ -124,19 +131,17 @@ class DatabaseLogger:
             **kwargs: Any
     ) -> None:
         """Логировать SQL запрос"""
-        log_data = {
-            "operation": operation,
-            "table": table,
-            **kwargs,
-        }
+        # kwargs - уже новый словарь, дополняем его на месте без копирования
+        kwargs["operation"] = operation
+        kwargs["table"] = table
 
         if duration_ms is not None:
-            log_data["duration_ms"] = round(duration_ms, 2)
+            kwargs["duration_ms"] = round(duration_ms, 2)
 
         if rows_affected is not None:
-            log_data["rows_affected"] = rows_affected
+            kwargs["rows_affected"] = rows_affected
 
-        self.logger.info("db_query", **log_data)
+        self.logger.info("db_query", **kwargs)
 
     async def log_error(
             self,
@@ -162,7 +167,8 @@ class ExternalAPILogger:
 
     def __init__(self, api_name: str, service: str = None):
         self.api_name = api_name
-        self.logger = get_logger(f"external_api.{api_name}", service=service)
+        # api привязан к логгеру один раз, а не передаётся в каждом вызове
+        self.logger = get_logger(f"external_api.{api_name}", service=service, api=api_name)
 
     def log_request(
             self,
@@ -173,7 +179,6 @@ class ExternalAPILogger:
         """Логировать начало запроса"""
         self.logger.info(
             "api_request_started",
-            api=self.api_name,
             method=method,
             endpoint=endpoint,
             **kwargs,
@@ -190,7 +195,6 @@ class ExternalAPILogger:
         """Логировать успешный ответ"""
         self.logger.info(
             "api_response_received",
-            api=self.api_name,
             method=method,
             endpoint=endpoint,
             status_code=status_code,
@@ -208,7 +212,6 @@ class ExternalAPILogger:
         """Логировать ошибку"""
         self.logger.error(
             "api_request_failed",
-            api=self.api_name,
             method=method,
             endpoint=endpoint,
             error=str(error),
@@ -304,15 +307,15 @@ class LogContext:
 
     def __init__(self, **context: Any):
         self.context = context
-        self.previous_context = {}
+        self._tokens = {}
 
     def __enter__(self):
-        bind_contextvars(**self.context)
+        self._tokens = bind_contextvars(**self.context)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        # Контекст автоматически очистится при выходе из scope
-        pass
+        # Возвращаем значения, которые были до входа (в т.ч. для вложенных LogContext)
+        reset_contextvars(**self._tokens)
 
 # Пример использования:
 # with LogContext(operation="payment", payment_id=123):
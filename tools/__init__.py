@@ -1 +1 @@
-from .hash import PasswordHasher
\ No newline at end of file
+from .hash import PasswordHasher, Argon2Hasher, BcryptHasher
\ No newline at end of file
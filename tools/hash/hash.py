@@ -1,6 +1,77 @@
+import asyncio
+
+import argon2
 import bcrypt
 from typing import Optional
 
+from config.settings import get_password_settings
+
+password_settings = get_password_settings()
+
+
+class Argon2Hasher:
+    """Хэширование и проверка паролей с помощью argon2id"""
+
+    _hasher = argon2.PasswordHasher(time_cost=2, memory_cost=65536, parallelism=2)
+
+    @staticmethod
+    def hash_password(password: str) -> str:
+        """
+        Хэширует пароль с помощью argon2id
+        :param password:  Пароль в виде строки
+        :return: Хэшированный пароль в виде строки
+        """
+        return Argon2Hasher._hasher.hash(password)
+
+    @staticmethod
+    def verify_password(password: str, hashed_password: str) -> bool:
+        """
+        Проверяет соответствие пароля argon2-хэшу
+        :param password: Пароль для проверки
+        :param hashed_password: Хэшированный пароль
+        :return: Если пароль верный - True, иначе - False
+        """
+        try:
+            return Argon2Hasher._hasher.verify(hashed_password, password)
+        except argon2.exceptions.VerificationError:
+            return False
+        except argon2.exceptions.InvalidHashError:
+            return False
+
+    @staticmethod
+    def needs_rehash(hashed_password: str) -> bool:
+        """
+        Проверяет, отличаются ли параметры argon2-хэша от текущих
+        :param hashed_password: Хэшированный пароль
+        :return: Если хэш нужно пересчитать - True, иначе - False
+        """
+        return Argon2Hasher._hasher.check_needs_rehash(hashed_password)
+
+
+class BcryptHasher:
+    """Хэширование и проверка паролей с помощью bcrypt (формат старых записей)"""
+
+    @staticmethod
+    def hash_password(password: str, rounds: Optional[int] = None) -> str:
+        """
+        Хэширует пароль с помощью bcrypt
+        :param password:  Пароль в виде строки
+        :param rounds: Стоимость (по умолчанию BCRYPT_ROUNDS из настроек)
+        :return: Хэшированный пароль в виде строки
+        """
+        salt = bcrypt.gensalt(rounds or password_settings.BCRYPT_ROUNDS)
+        return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+    @staticmethod
+    def verify_password(password: str, hashed_password: str) -> bool:
+        """
+        Проверяет соответствие пароля bcrypt-хэшу
+        :param password: Пароль для проверки
+        :param hashed_password: Хэшированный пароль
+        :return: Если пароль верный - True, иначе - False
+        """
+        return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
 
 class PasswordHasher:
     """Безопасное хэширование и проверка паролей"""
@@ -8,23 +79,67 @@ class PasswordHasher:
     @staticmethod
     def hash_password(password: str) -> str:
         """
-        Хэширует пароль с помощью bcrypt
+        Хэширует пароль: argon2id или bcrypt, в зависимости от настройки PASSWORD_HASHER
+        :param password:  Пароль в виде строки
+        :return: Хэшированный пароль в виде строки
+        """
+        if password_settings.PASSWORD_HASHER == 'argon2':
+            return Argon2Hasher.hash_password(password)
+        return BcryptHasher.hash_password(password)
+
+    @staticmethod
+    async def hash_password_async(password: str) -> str:
+        """
+        Хэширует пароль в пуле потоков, не блокируя event loop
         :param password:  Пароль в виде строки
         :return: Хэшированный пароль в виде строки
         """
-        password_bytes = password.encode('utf-8')
-        salt = bcrypt.gensalt(12)
-        hashed = bcrypt.hashpw(password_bytes, salt)
-        return hashed.decode('utf-8')
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, PasswordHasher.hash_password, password)
+
+    @staticmethod
+    def needs_rehash(hashed_password: str) -> bool:
+        """
+        Проверяет, создан ли хэш текущим алгоритмом с текущими параметрами.
+        Вызывается после успешной проверки пароля, чтобы перевести старые хэши на актуальные настройки
+        :param hashed_password: Хэшированный пароль
+        :return: Если хэш нужно пересчитать - True, иначе - False
+        """
+        is_bcrypt = hashed_password.startswith('$2')
+        if password_settings.PASSWORD_HASHER == 'argon2':
+            return is_bcrypt or Argon2Hasher.needs_rehash(hashed_password)
+        # Стоимость bcrypt записана в хэше: $2b$12$...
+        return not is_bcrypt or int(hashed_password[4:6]) != password_settings.BCRYPT_ROUNDS
 
     @staticmethod
     def verify_password(password: str, hashed_password: str) -> bool:
         """
-        Проверяет соответствие пароля хэшу
+        Проверяет соответствие пароля хэшу (bcrypt-хэши старых записей определяются по префиксу $2)
         :param password: Пароль для проверки
         :param hashed_password: Хэшированный пароль
         :return: Если пароль верный - True, иначе - False
         """
-        password_bytes = password.encode('utf-8')
-        hashed_bytes = hashed_password.encode('utf-8')
-        return bcrypt.checkpw(password_bytes, hashed_bytes)
\ No newline at end of file
+        if not hashed_password.startswith('$2'):
+            return Argon2Hasher.verify_password(password, hashed_password)
+        return BcryptHasher.verify_password(password, hashed_password)
+
+
+    @staticmethod
+    async def verify_password_async(password: str, hashed_password: str) -> bool:
+        """
+        Проверяет пароль в пуле потоков, не блокируя event loop
+        :param password: Пароль для проверки
+        :param hashed_password: Хэшированный пароль
+        :return: Если пароль верный - True, иначе - False
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, PasswordHasher.verify_password, password, hashed_password)
+
+
+    @staticmethod
+    def warmup() -> None:
+        """Прогревает настроенный алгоритм (загрузка библиотеки, выделение памяти argon2), чтобы первый запрос не платил за инициализацию"""
+        PasswordHasher.hash_password('warmup')
+
+
+PasswordHasher.warmup()
@@ -1,14 +1,22 @@
+import base64
+import hashlib
+import hmac
+import time
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+import jwt
+import orjson
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from redis.asyncio import Redis
+from sqlalchemy import bindparam, func, select, update
+from redis.asyncio import ConnectionPool, Redis
 
 from db.models.models import AdminUser
-from tools import PasswordHasher
+from tools import Argon2Hasher, BcryptHasher, PasswordHasher
 from db import get_session
 from config import Settings
 
@@ -16,13 +24,43 @@ from config import Settings
 settings = Settings()
 
 # --- Подключение к Redis ---
-redis = Redis.from_url(settings.get_redis_url(), decode_responses=True)
+# Пул под конкурентность воркера; при установленном hiredis redis-py сам использует C-парсер RESP
+redis_pool = ConnectionPool.from_url(
+    settings.redis.get_url(),
+    max_connections=64,
+    health_check_interval=30,
+    socket_keepalive=True,
+    decode_responses=True,
+)
+redis = Redis(connection_pool=redis_pool)
 
 # --- JWT параметры ---
-SECRET_KEY = settings.jwt_secret_key
-ALGORITHM = settings.jwt_algorithm
-ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
-REFRESH_TOKEN_EXPIRE_DAYS = settings.refresh_token_expire_days
+SECRET_KEY = settings.jwt.SECRET_KEY
+ALGORITHM = settings.jwt.ALGORITHM
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.jwt.ACCESS_TOKEN_EXPIRE_MINUTES
+REFRESH_TOKEN_EXPIRE_DAYS = settings.jwt.REFRESH_TOKEN_EXPIRE_DAYS
+_ACCESS_TTL = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+_REFRESH_TTL = REFRESH_TOKEN_EXPIRE_DAYS * 86400
+
+
+def _b64url(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64url_decode(data: bytes) -> bytes:
+    return base64.b64decode(data + b"=" * (-len(data) % 4), altchars=b"-_", validate=True)
+
+
+# Заголовок и ключ неизменны - кодируем один раз при импорте
+_HMAC_DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+SECRET_BYTES = SECRET_KEY.encode()
+_HEADER_B64 = _b64url(orjson.dumps({"alg": ALGORITHM, "typ": "JWT"}))
+_HEADER_PREFIX = _HEADER_B64 + b"."
+
+# Локальный кэш статуса отзыва: повторные запросы с тем же токеном не ходят в Redis.
+# TTL короткий - отзыв, сделанный другим воркером, виден здесь не позже чем через REVOKED_CACHE_TTL секунд
+REVOKED_CACHE_TTL = 5
+_revoked_cache: TTLCache = TTLCache(maxsize=10_000, ttl=REVOKED_CACHE_TTL)
 
 # OAuth2 схема
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
@@ -37,27 +75,117 @@ def get_password_hash(password: str) -> str:
     return PasswordHasher.hash_password(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await PasswordHasher.verify_password_async(plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await PasswordHasher.hash_password_async(password)
+
+
+# Хэши-заглушки: проверяются, когда пользователь не найден, чтобы время ответа не выдавало существование логина.
+# Алгоритм заглушки выбирается по большинству активных пользователей: пока старые bcrypt-хэши
+# не переведены на argon2 при входе, проверка argon2 была бы заметно быстрее реальной
+_DUMMY_PASSWORD = "x" * 16
+_DUMMY_HASHES = {
+    "argon2": Argon2Hasher.hash_password(_DUMMY_PASSWORD),
+    "bcrypt": BcryptHasher.hash_password(_DUMMY_PASSWORD),
+}
+DUMMY_HASH_TTL = 300
+_dummy_hash_cache: TTLCache = TTLCache(maxsize=1, ttl=DUMMY_HASH_TTL)
+_HASH_ALGORITHMS_STMT = select(
+    func.count(), func.count().filter(AdminUser.password_hash.like("$2%"))
+).where(AdminUser.is_active == True)
+
+
+async def get_dummy_hash(db: AsyncSession) -> str:
+    """Хэш-заглушка того же алгоритма, что у большинства активных пользователей (пересчитывается раз в DUMMY_HASH_TTL)"""
+    dummy = _dummy_hash_cache.get("hash")
+    if dummy is None:
+        total, legacy = (await db.execute(_HASH_ALGORITHMS_STMT)).one()
+        if total:
+            algorithm = "bcrypt" if legacy * 2 > total else "argon2"
+        else:
+            algorithm = settings.password.PASSWORD_HASHER
+        dummy = _dummy_hash_cache["hash"] = _DUMMY_HASHES[algorithm]
+    return dummy
+
+# --- Ограничение частоты попыток входа ---
+LOGIN_RATE_LIMIT = 10  # попыток с одного IP
+LOGIN_RATE_WINDOW = 60  # секунд
+
+
+async def login_rate_limit(request: Request):
+    """Ограничивает число попыток входа с одного IP (счётчик в Redis на окно LOGIN_RATE_WINDOW)"""
+    key = f"login_attempts:{request.client.host if request.client else 'unknown'}"
+    # SET NX создаёт счётчик с TTL только в начале окна; работает на любой версии Redis (в отличие от EXPIRE NX)
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.set(key, 0, ex=LOGIN_RATE_WINDOW, nx=True)
+        pipe.incr(key)
+        _, attempts = await pipe.execute()
+    if attempts > LOGIN_RATE_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Слишком много попыток входа, попробуйте позже",
+            headers={"Retry-After": str(LOGIN_RATE_WINDOW)},
+        )
+
+
 # --- Создание токенов ---
+def _encode(payload: dict) -> str:
+    """Кодирование JWT (HS*): готовый заголовок, orjson для payload, подпись через hmac"""
+    digest = _HMAC_DIGESTS.get(ALGORITHM)
+    if digest is None:
+        return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+    signing_input = _HEADER_B64 + b"." + _b64url(orjson.dumps(payload))
+    signature = hmac.new(SECRET_BYTES, signing_input, digest).digest()
+    return (signing_input + b"." + _b64url(signature)).decode()
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire, "type": "access"})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    ttl = int(expires_delta.total_seconds()) if expires_delta else _ACCESS_TTL
+    to_encode["exp"] = int(time.time()) + ttl
+    to_encode["type"] = "access"
+    return _encode(to_encode)
 
 
 def create_refresh_token(data: dict) -> str:
-    expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode = data.copy()
-    to_encode.update({"exp": expire, "type": "refresh"})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    to_encode["exp"] = int(time.time()) + _REFRESH_TTL
+    to_encode["type"] = "refresh"
+    return _encode(to_encode)
 
 
 # --- Декодирование токена ---
-def decode_token(token: str) -> Optional[dict]:
+@lru_cache(maxsize=8192)
+def _decode_cached(token: str) -> Optional[dict]:
+    """Проверка подписи и разбор payload - один раз на токен; срок действия проверяется снаружи кэша"""
+    digest = _HMAC_DIGESTS.get(ALGORITHM)
     try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    except JWTError:
+        raw = token.encode()
+        if digest is None or not raw.startswith(_HEADER_PREFIX):
+            # Не-HS алгоритм или чужой заголовок - полная проверка через PyJWT
+            return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"verify_exp": False})
+        # Свой заголовок: одна HMAC с готовым ключом и разбор payload через orjson
+        signing_input, _, signature = raw.rpartition(b".")
+        expected = hmac.new(SECRET_BYTES, signing_input, digest).digest()
+        if not hmac.compare_digest(expected, _b64url_decode(signature)):
+            return None
+        payload = orjson.loads(_b64url_decode(signing_input[len(_HEADER_PREFIX):]))
+    except (jwt.PyJWTError, ValueError):
         return None
+    return payload if isinstance(payload, dict) else None
+
+
+def decode_token(token: str) -> Optional[dict]:
+    payload = _decode_cached(token)
+    if payload is None:
+        return None
+    exp = payload.get("exp")
+    if exp is not None and exp <= time.time():
+        return None
+    return dict(payload)
 
 
 # --- Управление отзывом токенов ---
@@ -67,42 +195,109 @@ async def revoke_token(token: str, expires_in: int):
     TTL задаётся так, чтобы Redis автоматически очищал истёкшие токены.
     """
     await redis.setex(f"revoked:{token}", expires_in, "true")
+    _revoked_cache[token] = True
+
+
+async def revoke_token_if_active(token: str, expires_in: int) -> bool:
+    """
+    Отзывает токен и сообщает, был ли он активен до этого.
+    SET NX атомарен: из параллельных запросов с одним токеном успешен только один.
+    """
+    if _revoked_cache.get(token):
+        return False
+    was_active = await redis.set(f"revoked:{token}", "true", ex=expires_in, nx=True)
+    _revoked_cache[token] = True
+    return bool(was_active)
 
 
 async def is_token_revoked(token: str) -> bool:
     """Проверяет, есть ли токен среди отозванных"""
-    return await redis.exists(f"revoked:{token}") == 1
+    revoked = _revoked_cache.get(token)
+    if revoked is None:
+        revoked = await redis.exists(f"revoked:{token}") == 1
+        _revoked_cache[token] = revoked
+    return revoked
 
 
 # --- Аутентификация пользователя ---
-async def authenticate_user(username: str, password: str, db: AsyncSession) -> Optional[AdminUser]:
-    result = await db.execute(
-        select(AdminUser).where(AdminUser.username == username, AdminUser.is_active == True)
-    )
-    user = result.scalar_one_or_none()
+class AuthUser(NamedTuple):
+    """Поля администратора, нужные для аутентификации и API (без загрузки ORM-объекта)"""
+    id: int
+    username: str
+    password_hash: str
+    full_name: Optional[str]
+    role: str
+    is_active: bool
+    last_login: Optional[datetime]
+
+
+_AUTH_USER_COLUMNS = (
+    AdminUser.id, AdminUser.username, AdminUser.password_hash, AdminUser.full_name,
+    AdminUser.role, AdminUser.is_active, AdminUser.last_login,
+)
+
+
+# Запросы собираются один раз; логин подставляется через bindparam
+_ACTIVE_USER_FILTER = (AdminUser.username == bindparam("username"), AdminUser.is_active == True)
+_ACTIVE_USER_STMT = select(*_AUTH_USER_COLUMNS).where(*_ACTIVE_USER_FILTER)
+_ACTIVE_USER_EXISTS_STMT = select(1).where(*_ACTIVE_USER_FILTER)
+
+
+async def get_active_user(username: str, db: AsyncSession) -> Optional[AuthUser]:
+    """Активный пользователь по логину"""
+    result = await db.execute(_ACTIVE_USER_STMT, {"username": username})
+    row = result.first()
+    return AuthUser(*row) if row else None
+
+
+async def active_user_exists(username: str, db: AsyncSession) -> bool:
+    """Проверяет наличие активного пользователя без загрузки строки"""
+    result = await db.execute(_ACTIVE_USER_EXISTS_STMT, {"username": username})
+    return result.scalar() is not None
+
+
+async def update_last_login(user_id: int, db: AsyncSession, password_hash: Optional[str] = None) -> datetime:
+    """Обновляет дату последнего входа (и, если передан, хэш пароля)"""
+    now = datetime.now()
+    values = {"last_login": now}
+    if password_hash is not None:
+        values["password_hash"] = password_hash
+    await db.execute(update(AdminUser).where(AdminUser.id == user_id).values(**values))
+    await db.commit()
+    return now
+
+
+async def authenticate_user(username: str, password: str, db: AsyncSession) -> Optional[AuthUser]:
+    user = await get_active_user(username, db)
 
-    if not user or not verify_password(password, user.password_hash):
+    # Проверка хэша занимает сотни мс CPU - выполняем вне event loop
+    if not user:
+        await verify_password_async(password, await get_dummy_hash(db))
         return None
 
-    return user
+    if not await verify_password_async(password, user.password_hash):
+        return None
+
+    # Старые хэши (bcrypt или устаревшие параметры) пересчитываем, пока пароль известен
+    new_hash = None
+    if PasswordHasher.needs_rehash(user.password_hash):
+        new_hash = await get_password_hash_async(password)
+
+    # Дата последнего входа обновляется только при входе, а не на каждом запросе
+    last_login = await update_last_login(user.id, db, password_hash=new_hash)
+    return user._replace(last_login=last_login, password_hash=new_hash or user.password_hash)
 
 
 # --- Получение текущего пользователя ---
-async def get_current_user(
-    request: Request,
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_session)
-) -> AdminUser:
-    """
-    Получение текущего пользователя по JWT токену
-    Поддерживает токен из заголовка Authorization или cookies
-    """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Не удалось проверить учетные данные",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+_credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Не удалось проверить учетные данные",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
 
+async def _username_from_token(request: Request, token: Optional[str]) -> str:
+    """Извлекает логин из access токена (заголовок Authorization или cookie)"""
     # Если токен не из заголовка, пробуем достать из cookie
     if not token:
         cookie_token = request.cookies.get("access_token")
@@ -110,7 +305,7 @@ async def get_current_user(
             token = cookie_token.replace("Bearer ", "")
 
     if not token:
-        raise credentials_exception
+        raise _credentials_exception
 
     # Проверка отзыва токена
     if await is_token_revoked(token):
@@ -123,7 +318,7 @@ async def get_current_user(
     # Декодируем JWT
     payload = decode_token(token)
     if not payload:
-        raise credentials_exception
+        raise _credentials_exception
 
     if payload.get("type") != "access":
         raise HTTPException(
@@ -134,19 +329,42 @@ async def get_current_user(
 
     username: str = payload.get("sub")
     if not username:
-        raise credentials_exception
+        raise _credentials_exception
+
+    return username
+
+
+async def get_current_user(
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_session)
+) -> AuthUser:
+    """
+    Получение текущего пользователя по JWT токену
+    Поддерживает токен из заголовка Authorization или cookies
+    """
+    username = await _username_from_token(request, token)
 
     # Проверяем пользователя
-    result = await db.execute(
-        select(AdminUser).where(AdminUser.username == username, AdminUser.is_active == True)
-    )
-    user = result.scalar_one_or_none()
+    user = await get_active_user(username, db)
 
     if not user:
-        raise credentials_exception
-
-    # Обновляем дату последнего входа
-    user.last_login = datetime.now()
-    await db.commit()
+        raise _credentials_exception
 
     return user
+
+
+async def get_current_username(
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_session)
+) -> str:
+    """
+    Логин текущего пользователя - для эндпоинтов, которым нужна только проверка доступа
+    """
+    username = await _username_from_token(request, token)
+
+    if not await active_user_exists(username, db):
+        raise _credentials_exception
+
+    return username
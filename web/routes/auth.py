@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+import time
+from functools import lru_cache
+
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, ORJSONResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import update
 from pydantic import BaseModel
 
 from db.models.models import AdminUser
@@ -12,15 +16,28 @@ from web.auth import (
     create_access_token,
     create_refresh_token,
     decode_token,
-    revoke_token,
-    is_token_revoked,
-    get_password_hash,
-    get_current_user
+    revoke_token_if_active,
+    get_password_hash_async,
+    verify_password_async,
+    get_current_user,
+    get_current_username,
+    get_active_user,
+    update_last_login,
+    login_rate_limit,
+    AuthUser
 )
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 templates = Jinja2Templates(directory="web/templates")
 
+# Готовые заголовки Set-Cookie (токены содержат только base64url-символы и точки, экранирование не нужно)
+_ACCESS_COOKIE = 'access_token="Bearer {}"; HttpOnly; Max-Age=1800; Path=/; SameSite=lax'  # 30 минут
+_REFRESH_COOKIE = 'refresh_token={}; HttpOnly; Max-Age=604800; Path=/; SameSite=lax'  # 7 дней
+_DELETE_AUTH_COOKIES = [
+    (b"set-cookie", f'{name}=""; expires=Thu, 01 Jan 1970 00:00:00 GMT; Max-Age=0; Path=/; SameSite=lax'.encode())
+    for name in ("access_token", "refresh_token")
+]
+
 
 # Pydantic модели
 class Token(BaseModel):
@@ -42,20 +59,23 @@ class ChangePassword(BaseModel):
 # HTML страницы
 # ============================================
 
+@lru_cache(maxsize=1)
+def _login_page_html() -> bytes:
+    """Страница входа статична - рендерим один раз и отдаём готовые байты"""
+    return templates.get_template("login.html").render({"request": None, "error": None}).encode()
+
+
 @router.get("/login", response_class=HTMLResponse)
-async def login_page(request: Request):
+async def login_page():
     """Страница входа"""
-    return templates.TemplateResponse("login.html", {
-        "request": request
-    })
+    return HTMLResponse(content=_login_page_html(), headers={"Cache-Control": "public, max-age=60"})
 
 
 @router.get("/logout", response_class=HTMLResponse)
 async def logout_page():
     """Выход из системы"""
     response = RedirectResponse(url="/auth/login", status_code=303)
-    response.delete_cookie("access_token")
-    response.delete_cookie("refresh_token")
+    response.raw_headers.extend(_DELETE_AUTH_COOKIES)
     return response
 
 
@@ -63,7 +83,7 @@ async def logout_page():
 # API endpoints
 # ============================================
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(login_rate_limit)])
 async def login(
         form_data: OAuth2PasswordRequestForm = Depends(),
         db: AsyncSession = Depends(get_session)
@@ -92,7 +112,7 @@ async def login(
     }
 
 
-@router.post("/login/form")
+@router.post("/login/form", dependencies=[Depends(login_rate_limit)])
 async def login_form(
         form_data: OAuth2PasswordRequestForm = Depends(),
         db: AsyncSession = Depends(get_session)
@@ -115,20 +135,10 @@ async def login_form(
 
     # Устанавливаем в cookies
     response = RedirectResponse(url="/groups", status_code=303)
-    response.set_cookie(
-        key="access_token",
-        value=f"Bearer {access_token}",
-        httponly=True,
-        max_age=1800,  # 30 минут
-        samesite="lax"
-    )
-    response.set_cookie(
-        key="refresh_token",
-        value=refresh_token,
-        httponly=True,
-        max_age=604800,  # 7 дней
-        samesite="lax"
-    )
+    response.raw_headers.extend((
+        (b"set-cookie", _ACCESS_COOKIE.format(access_token).encode()),
+        (b"set-cookie", _REFRESH_COOKIE.format(refresh_token).encode()),
+    ))
 
     return response
 
@@ -141,13 +151,6 @@ async def refresh_token_endpoint(
     """
     Обновление access токена с помощью refresh токена
     """
-    # Проверяем, не отозван ли refresh токен
-    if is_token_revoked(token_data.refresh_token):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Refresh токен отозван"
-        )
-
     # Декодируем refresh токен
     payload = decode_token(token_data.refresh_token)
     if payload is None:
@@ -170,15 +173,16 @@ async def refresh_token_endpoint(
             detail="Неверный токен"
         )
 
-    # Проверяем, существует ли пользователь
-    from sqlalchemy import select
-    result = await db.execute(
-        select(AdminUser).where(
-            AdminUser.username == username,
-            AdminUser.is_active == True
+    # Отзываем старый refresh токен; если он уже был отозван - отказываем
+    expires_in = max(int(payload.get("exp", 0) - time.time()), 1)
+    if not await revoke_token_if_active(token_data.refresh_token, expires_in):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh токен отозван"
         )
-    )
-    user = result.scalar_one_or_none()
+
+    # Проверяем, существует ли пользователь
+    user = await get_active_user(username, db)
 
     if not user:
         raise HTTPException(
@@ -186,13 +190,13 @@ async def refresh_token_endpoint(
             detail="Пользователь не найден"
         )
 
+    # Обновление токенов считается входом
+    await update_last_login(user.id, db)
+
     # Создаем новые токены
     new_access_token = create_access_token(data={"sub": username})
     new_refresh_token = create_refresh_token(data={"sub": username})
 
-    # Отзываем старый refresh токен
-    revoke_token(token_data.refresh_token)
-
     return {
         "access_token": new_access_token,
         "refresh_token": new_refresh_token,
@@ -202,7 +206,7 @@ async def refresh_token_endpoint(
 
 @router.post("/logout")
 async def logout(
-        current_user: AdminUser = Depends(get_current_user),
+        current_user: str = Depends(get_current_username),
         access_token: str = Depends(lambda: None)  # Получаем из headers
 ):
     """
@@ -217,7 +221,7 @@ async def logout(
 
 @router.post("/logout/all")
 async def logout_all(
-        current_user: AdminUser = Depends(get_current_user)
+        current_user: str = Depends(get_current_username)
 ):
     """
     Выход на всех устройствах
@@ -232,23 +236,24 @@ async def logout_all(
 @router.post("/change-password")
 async def change_password(
         password_data: ChangePassword,
-        current_user: AdminUser = Depends(get_current_user),
+        current_user: AuthUser = Depends(get_current_user),
         db: AsyncSession = Depends(get_session)
 ):
     """
     Смена пароля
     """
-    from web.auth import verify_password
-
-    # Проверяем старый пароль (используем поле password вместо password_hash)
-    if not verify_password(password_data.old_password, current_user.password):
+    # Проверяем старый пароль
+    if not await verify_password_async(password_data.old_password, current_user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Неверный старый пароль"
         )
 
     # Устанавливаем новый пароль
-    current_user.password = get_password_hash(password_data.new_password)
+    password_hash = await get_password_hash_async(password_data.new_password)
+    await db.execute(
+        update(AdminUser).where(AdminUser.id == current_user.id).values(password_hash=password_hash)
+    )
     await db.commit()
 
     return {"message": "Пароль успешно изменен"}
@@ -256,7 +261,7 @@ async def change_password(
 
 @router.get("/me")
 async def get_current_user_info(
-        current_user: AdminUser = Depends(get_current_user)
+        current_user: AuthUser = Depends(get_current_user)
 ):
     """
     Получение информации о текущем пользователе
@@ -1,4 +1,6 @@
+import argparse
 import asyncio
+import os
 import sys
 from pathlib import Path
 
@@ -6,13 +8,58 @@ from pathlib import Path
 ROOT_DIR = Path(__file__).resolve().parent.parent.parent
 sys.path.append(str(ROOT_DIR))
 
-from db import get_session
+from sqlalchemy import select
+
+from db.session import async_session_maker
+from db.crud import create_admin_user
 from db.models import AdminUser
-from tools import PasswordHasher
 
 
-async def create_admin():
-    """Создание администратора с правами доступа"""
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Создание администратора веб-панели. "
+                    "Если передан любой из параметров, нужны логин, email, пароль и полное имя - "
+                    "скрипт запускается без вопросов."
+    )
+    parser.add_argument("--username", help="Имя пользователя")
+    parser.add_argument("--email", help="Email")
+    parser.add_argument("--password",
+                        help="Пароль (минимум 6 символов). Виден в списке процессов - "
+                             "лучше --password-stdin или переменная окружения ADMIN_PASSWORD")
+    parser.add_argument("--password-stdin", action="store_true", help="Прочитать пароль из stdin")
+    parser.add_argument("--full-name", help="Полное имя")
+    parser.add_argument("--role", choices=("admin", "editor"), help="Роль (по умолчанию editor)")
+    parser.add_argument("--active", action=argparse.BooleanOptionalAction,
+                        help="Активировать сразу (по умолчанию да)")
+    return parser
+
+
+# Проверки полей: условие и сообщение об ошибке
+_FIELD_CHECKS = {
+    "username": (lambda value: bool(value), "❌ Имя пользователя не может быть пустым"),
+    "email": (lambda value: bool(value), "❌ Email не может быть пустым"),
+    "password": (lambda value: len(value) >= 6, "❌ Пароль должен быть минимум 6 символов"),
+    "full_name": (lambda value: bool(value), "❌ Полное имя не может быть пустым"),
+}
+
+
+def validate_field(field: str, value: str) -> bool:
+    """Проверяет одно поле, выводит ошибку"""
+    check, error = _FIELD_CHECKS[field]
+    if not check(value):
+        print(error)
+        return False
+    return True
+
+
+def validate(username: str, email: str, password: str, full_name: str) -> bool:
+    """Проверяет введённые данные, выводит первую ошибку"""
+    return (validate_field("username", username) and validate_field("email", email)
+            and validate_field("password", password) and validate_field("full_name", full_name))
+
+
+def prompt_admin_data() -> dict | None:
+    """Интерактивный ввод данных администратора"""
 
     print("=" * 60)
     print("🔐 Создание администратора веб-панели")
@@ -21,29 +68,25 @@ async def create_admin():
 
     # Ввод данных
     username = input("Имя пользователя: ").strip()
-    if not username:
-        print("❌ Имя пользователя не может быть пустым")
-        return
+    if not validate_field("username", username):
+        return None
 
     email = input("Email: ").strip()
-    if not email:
-        print("❌ Email не может быть пустым")
-        return
+    if not validate_field("email", email):
+        return None
 
     password = input("Пароль (минимум 6 символов): ").strip()
-    if len(password) < 6:
-        print("❌ Пароль должен быть минимум 6 символов")
-        return
+    if not validate_field("password", password):
+        return None
 
     password_confirm = input("Подтвердите пароль: ").strip()
     if password != password_confirm:
         print("❌ Пароли не совпадают")
-        return
+        return None
 
     full_name = input("Полное имя: ").strip()
-    if not full_name:
-        print("❌ Полное имя не может быть пустым")
-        return
+    if not validate_field("full_name", full_name):
+        return None
 
     # Роль
     print("\nВыберите роль:")
@@ -56,60 +99,88 @@ async def create_admin():
     is_active_input = input("\nАктивировать сразу? (y/n) [y]: ").strip().lower()
     is_active = is_active_input != 'n'
 
-    # Создаем в БД
-    async for session in get_session():
+    return dict(username=username, email=email, password=password,
+                full_name=full_name, role=role, is_active=is_active)
+
+
+async def create_admin(username: str, email: str, password: str, full_name: str,
+                       role: str, is_active: bool) -> bool:
+    """Создание администратора с правами доступа"""
+    async with async_session_maker() as session:
         # Проверяем, существует ли пользователь
-        from sqlalchemy import select
         result = await session.execute(
-            select(AdminUser).where(AdminUser.username == username)
+            select(1).where(AdminUser.username == username)
         )
-        existing = result.scalar_one_or_none()
-
-        if existing:
+        if result.scalar() is not None:
             print(f"❌ Пользователь '{username}' уже существует")
-            return
-
-        # Хешируем пароль через ваш класс
-        hashed_password = PasswordHasher.hash_password(password)
-
-        # Создаем нового админа
-        admin = AdminUser(
-            username=username,
-            email=email,
-            full_name=full_name,
-            password_hash=hashed_password,  # Используем поле password, а не password_hash
-            role=role,
-            is_active=is_active
-        )
+            return False
 
-        session.add(admin)
-        await session.commit()
-
-        print()
-        print("✅ Администратор успешно создан!")
-        print()
-        print("📋 Данные для входа:")
-        print(f"   Логин: {username}")
-        print(f"   Email: {email}")
-        print(f"   Роль: {role}")
-        print(f"   Статус: {'✅ Активен' if is_active else '⏳ Не активен'}")
-        print()
-        if is_active:
-            print("🌐 Откройте: http://localhost:8000/auth/login")
-        else:
-            print("⚠️  Учетная запись не активна. Обратитесь к главному администратору.")
-        print()
+        # Пароль хэшируется в отдельном потоке внутри create_admin_user
+        await create_admin_user(session, username=username, email=email, full_name=full_name,
+                                password=password, role=role, is_active=is_active)
 
-        break
+    print()
+    print("✅ Администратор успешно создан!")
+    print()
+    print("📋 Данные для входа:")
+    print(f"   Логин: {username}")
+    print(f"   Email: {email}")
+    print(f"   Роль: {role}")
+    print(f"   Статус: {'✅ Активен' if is_active else '⏳ Не активен'}")
+    print()
+    if is_active:
+        print("🌐 Откройте: http://localhost:8000/auth/login")
+    else:
+        print("⚠️  Учетная запись не активна. Обратитесь к главному администратору.")
+    print()
+    return True
+
+
+def main() -> int:
+    parser = build_parser()
+    args = parser.parse_args()
+    batch = any((args.username, args.email, args.full_name, args.password, args.password_stdin,
+                 args.role is not None, args.active is not None))
+
+    if batch:
+        # Пакетный режим: все данные переданы аргументами, вопросы не задаются
+        if args.password_stdin:
+            password = sys.stdin.readline().rstrip("\n")
+        else:
+            password = args.password or os.environ.get("ADMIN_PASSWORD")
+        missing = [flag for flag, value in (
+            ("--username", args.username),
+            ("--email", args.email),
+            ("--password/--password-stdin/ADMIN_PASSWORD", password),
+            ("--full-name", args.full_name),
+        ) if not value]
+        if missing:
+            parser.error(f"в пакетном режиме обязательны: {', '.join(missing)}")
+
+        data = dict(username=args.username.strip(), email=args.email.strip(), password=password,
+                    full_name=args.full_name.strip(), role=args.role or "editor",
+                    is_active=args.active if args.active is not None else True)
+        if not validate(data["username"], data["email"], data["password"], data["full_name"]):
+            return 1
+    else:
+        if not sys.stdin.isatty():
+            parser.error("нет терминала для интерактивного ввода - передайте данные аргументами")
+        data = prompt_admin_data()
+        if data is None:
+            return 1
+
+    return 0 if asyncio.run(create_admin(**data)) else 1
 
 
 if __name__ == "__main__":
     try:
-        asyncio.run(create_admin())
+        sys.exit(main())
     except KeyboardInterrupt:
         print("\n\n❌ Отменено пользователем")
+        sys.exit(1)
     except Exception as e:
         print(f"\n\n❌ Ошибка: {e}")
         import traceback
 
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
+        sys.exit(1)